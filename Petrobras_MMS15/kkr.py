@@ -1,19 +1,31 @@
 # petrobras_mms15.py
 # Série PETROBRAS 2008-2015, MMS(15) por ano e no geral, com retries e fallback.
 
+from __future__ import annotations
+
 import argparse
 import os
 from pathlib import Path
+import sys
 import time
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from comum.colunar import ColumnStore
+from comum.graficos import ChartJob, render_charts
+from comum.perfil import Profiler, add_profile_args, lazy_import
 
-import pandas as pd
-import matplotlib.pyplot as plt
+# imports pesados só carregam quando usados (--help e --no-plots ficam rápidos);
+# matplotlib e yfinance são importados dentro das funções que os usam
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
-try:
-    import yfinance as yf
-except Exception:
-    yf = None
 
+PERIODO_INICIO = "2008-01-01"
+PERIODO_FIM = "2015-12-31"   # exclusivo, como no yfinance
+
+# fetcher(ticker, start, end) -> DataFrame indexado por data com coluna 'close'
+Fetcher = Callable[[str, str, str], "pd.DataFrame"]
 
 
 def to_scalar(x) -> float:
@@ -51,10 +63,13 @@ def load_from_csv(csv_path: str) -> pd.DataFrame:
     return out
 
 
-def download_prices_yf(ticker: str, start="2008-01-01", end="2015-12-31",
+def download_prices_yf(ticker: str, start=PERIODO_INICIO, end=PERIODO_FIM,
                        retries: int = 3, sleep_sec: float = 2.0) -> pd.DataFrame:
-    if yf is None:
-        raise RuntimeError("Pacote yfinance não disponível. Instale com: pip install yfinance")
+    # import de verdade fora do laço de retries: pacote ausente ou quebrado falha na hora
+    try:
+        import yfinance as yf
+    except Exception:
+        raise RuntimeError("Pacote yfinance não disponível. Instale com: pip install yfinance") from None
 
     last_exc = None
     for i in range(retries):
@@ -81,24 +96,281 @@ def download_prices_yf(ticker: str, start="2008-01-01", end="2015-12-31",
     raise RuntimeError(f"Falha ao baixar {ticker}: {last_exc}")
 
 
-def get_prices(ticker: str, csv_path: str | None) -> pd.DataFrame:
+def close_series(df: pd.DataFrame) -> pd.Series:
+    """Extrai 'close' como Series 1-D (o yfinance às vezes devolve colunas MultiIndex)."""
+    s = df["close"]
+    if isinstance(s, pd.DataFrame):
+        s = s.iloc[:, 0]
+    return s.astype(float)
+
+
+def price_frame(close: pd.Series) -> pd.DataFrame:
+    """Frame plano 'close'/'year' indexado por data (datetime64[ns]), venha de onde vier."""
+    out = pd.DataFrame({"close": close.to_numpy(dtype=float)},
+                       index=pd.DatetimeIndex(close.index).astype("datetime64[ns]"))
+    out["year"] = out.index.year
+    return out
+
+
+# ===================== CACHE LOCAL DE PREÇOS =====================
+class PriceStore:
+    """
+    Cache colunar local de preços: um arquivo .npz por ticker com as colunas
+    'date' (datetime64[D]) e 'close' (float64), mais o intervalo [lo, hi) já
+    coberto por buscas anteriores. Só o que estiver fora desse intervalo é
+    pedido ao fetcher; o intervalo coberto é sempre mantido contíguo.
+    """
+
+    # trechos curtos que voltam vazios são feriados, não falha de download
+    MAX_EMPTY_GAP_BDAYS = 5
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def _path(self, ticker: str) -> Path:
+        return self.root / f"{ticker.upper().replace('.', '_')}.npz"
+
+    def load(self, ticker: str):
+        """Retorna (Series de fechamento, (lo, hi)) ou (Series vazia, None) se não houver cache."""
+        path = self._path(ticker)
+        if not path.exists():
+            return pd.Series(dtype=float, index=pd.DatetimeIndex([])), None
+        with np.load(path, allow_pickle=False) as z:
+            s = pd.Series(z["close"], index=pd.DatetimeIndex(z["date"]), name="close")
+            lo, hi = z["span"]
+        return s, (lo, hi)
+
+    def save(self, ticker: str, close: pd.Series, span) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(ticker)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(
+            tmp,
+            date=close.index.values.astype("datetime64[D]"),
+            close=close.to_numpy(dtype=np.float64),
+            span=np.array(span, dtype="datetime64[D]"),
+        )
+        os.replace(tmp, path)   # escrita atômica
+        return path
+
+    @staticmethod
+    def missing_ranges(span, start: str, end: str) -> list[tuple[str, str]]:
+        """Trechos [a, b) de [start, end) ainda não cobertos (incluindo o vão até o cache)."""
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        if span is None:
+            gaps = [(start, end)]
+        else:
+            lo, hi = span
+            gaps = []
+            if start < lo:
+                gaps.append((start, lo))
+            if end > hi:
+                gaps.append((hi, end))
+        # trechos sem nenhum dia útil (fim de semana) não valem uma requisição
+        return [(str(a), str(b)) for a, b in gaps if np.busday_count(a, b) > 0]
+
+    def get(self, ticker: str, start: str = PERIODO_INICIO, end: str = PERIODO_FIM,
+            fetcher: Fetcher | None = None) -> pd.DataFrame:
+        """
+        Serve [start, end) a partir do cache, buscando e mesclando só os trechos
+        que faltam. Com fetcher=None (modo offline) nada é buscado e a falta de
+        cobertura vira RuntimeError.
+
+        Um trecho cuja busca falha (o download_prices_yf levanta RuntimeError
+        quando não vem nenhum pregão) e que tem até MAX_EMPTY_GAP_BDAYS dias
+        úteis conta como coberto e sem pregões (feriados). Trechos maiores que
+        falham ficam fora do intervalo coberto e são tentados de novo na próxima
+        execução; se mesmo assim houver preços em [start, end), eles são servidos
+        com um aviso. Só quando cache + buscas não trazem nada é que sai
+        RuntimeError (e o get_prices tenta o outro ticker).
+        """
+        close, span = self.load(ticker)
+        gaps = self.missing_ranges(span, start, end)
+        failed = []
+        if gaps:
+            if fetcher is None:
+                raise RuntimeError(f"Cache de {ticker} não cobre {gaps} (modo offline).")
+            parts = [close]
+            lo, hi = span if span is not None else (None, None)
+            for a, b in gaps:
+                try:
+                    parts.append(close_series(fetcher(ticker, a, b)))
+                except RuntimeError as e:
+                    if np.busday_count(a, b) > self.MAX_EMPTY_GAP_BDAYS:
+                        failed.append(f"[{a}, {b}): {e}")
+                        continue
+                a, b = np.datetime64(a, "D"), np.datetime64(b, "D")
+                lo = a if lo is None else min(lo, a)
+                hi = b if hi is None else max(hi, b)
+            close = pd.concat(parts).dropna()
+            close = close[~close.index.duplicated(keep="last")].sort_index()
+            if lo is not None:
+                self.save(ticker, close, (lo, hi))
+
+        sel = close[(close.index >= start) & (close.index < end)]
+        if sel.empty:
+            raise RuntimeError(f"Sem preços de {ticker} em [{start}, {end})."
+                               + (f" Falhas: {'; '.join(failed)}" if failed else ""))
+        if failed:
+            print(f"Aviso: trechos de {ticker} sem dados, servindo o que há no cache: "
+                  + "; ".join(failed))
+        return price_frame(sel)
+
+
+def get_prices(ticker: str, csv_path: str | None, store: PriceStore | None = None,
+               offline: bool = False, fetcher: Fetcher = download_prices_yf,
+               start: str = PERIODO_INICIO, end: str = PERIODO_FIM) -> pd.DataFrame:
     if csv_path:
         print(f"Lendo dados do CSV: {csv_path}")
         return load_from_csv(csv_path)
-    print(f"Baixando {ticker} (2008–2015)...")
+    if offline and store is None:
+        raise RuntimeError("Modo offline exige --csv ou um cache de preços.")
+
+    def fetch(t: str) -> pd.DataFrame:
+        if store is None:
+            # o yfinance devolve colunas MultiIndex ('close', ticker): achata aqui
+            return price_frame(close_series(fetcher(t, start, end)).dropna())
+        return store.get(t, start, end, fetcher=None if offline else fetcher)
+
+    print(f"{'Lendo cache de' if offline else 'Obtendo'} {ticker} ({start[:4]}–{end[:4]})...")
     try:
-        return download_prices_yf(ticker)
+        return fetch(ticker)
     except RuntimeError as e:
         # tenta fallback de ticker (PETR3 <-> PETR4)
         alt = "PETR3.SA" if ticker.upper().startswith("PETR4") else "PETR4.SA"
         print(f"Aviso: {e}\nTentando fallback {alt} ...")
-        return download_prices_yf(alt)
-
-
-
-def plot_year(df_year: pd.DataFrame, year: int, outdir: Path):
+        return fetch(alt)
+
+
+
+# ===================== INDICADORES =====================
+class IndicatorEngine:
+    """
+    MMS, MME e desvio padrão móveis para várias janelas sobre um painel
+    (datas x tickers), numa única passada vetorizada baseada em somas
+    cumulativas. Depois de fit(), update() incorpora um novo pregão em O(1)
+    por ticker e janela, sem recalcular o histórico.
+
+    Resultados em self.values[(nome, janela)] -> DataFrame (datas x tickers),
+    com nome em {"mms", "mme", "dp"}. A MMS segue rolling(w, min_periods=1),
+    o DP usa ddof=1 e a MME usa span=w (adjust=False); NaN são ignorados.
+    fit() num painel vazio (só as colunas) é válido: os indicadores saem
+    vazios e o histórico é construído inteiro por update().
+
+    update() só transmite: devolve os indicadores do novo pregão e não mexe em
+    self.values nem em columns_for(), que continuam refletindo o último fit()
+    (acrescentar linhas a cada DataFrame custaria O(T) por pregão). Quem
+    precisa do histórico completo guarda as saídas de update().
+    """
+
+    NAMES = ("mms", "mme", "dp")
+
+    def __init__(self, windows=(15,)):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        if not self.windows or self.windows[0] < 1:
+            raise ValueError(f"Janelas precisam ser inteiros >= 1 (recebido: {list(windows)}).")
+        self.values: dict[tuple[str, int], pd.DataFrame] = {}
+
+    def fit(self, panel: pd.DataFrame) -> dict[tuple[str, int], pd.DataFrame]:
+        x = panel.to_numpy(dtype=np.float64)
+        T, N = x.shape
+        valid = np.isfinite(x)
+        # centraliza cada coluna no 1º valor válido para reduzir cancelamento em sum(x²)
+        if T:
+            first = np.argmax(valid, axis=0)
+            self._shift = np.where(valid.any(axis=0), x[first, np.arange(N)], 0.0)
+        else:
+            self._shift = np.zeros(N)
+        xc = np.where(valid, x - self._shift, 0.0)
+
+        zero = np.zeros((1, N))
+        cs = np.vstack([zero, np.cumsum(xc, axis=0)])
+        cs2 = np.vstack([zero, np.cumsum(xc * xc, axis=0)])
+        cn = np.vstack([zero, np.cumsum(valid, axis=0, dtype=np.float64)])
+
+        hi = np.arange(1, T + 1)
+        self.values = {}
+        for w in self.windows:
+            lo = np.maximum(hi - w, 0)
+            ssum, ssq, cnt = cs[hi] - cs[lo], cs2[hi] - cs2[lo], cn[hi] - cn[lo]
+            self._put(panel, w, ssum, ssq, cnt)
+            self.values[("mme", w)] = panel.ewm(span=w, adjust=False, ignore_na=True).mean()
+
+        # estado para atualizações incrementais
+        self._wmax = max(self.windows)
+        self._buf = np.full((self._wmax, N), np.nan)
+        tail = np.where(valid, xc, np.nan)[-self._wmax:]
+        self._t = T
+        for k, row in zip(range(T - len(tail), T), tail):
+            self._buf[k % self._wmax] = row
+        self._sum = np.stack([cs[T] - cs[max(T - w, 0)] for w in self.windows])
+        self._sq = np.stack([cs2[T] - cs2[max(T - w, 0)] for w in self.windows])
+        self._cnt = np.stack([cn[T] - cn[max(T - w, 0)] for w in self.windows])
+        self._ema = np.stack([self.values[("mme", w)].ffill().iloc[-1].to_numpy()
+                              if T else np.full(N, np.nan) for w in self.windows])
+        self._columns = panel.columns
+        return self.values
+
+    def _put(self, panel, w, ssum, ssq, cnt):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = ssum / cnt
+            var = np.maximum(ssq - ssum * mean, 0.0) / (cnt - 1)
+        mean[cnt == 0] = np.nan
+        var[cnt < 2] = np.nan
+        self.values[("mms", w)] = pd.DataFrame(mean + self._shift, index=panel.index,
+                                               columns=panel.columns)
+        self.values[("dp", w)] = pd.DataFrame(np.sqrt(var), index=panel.index,
+                                              columns=panel.columns)
+
+    def update(self, row: pd.Series) -> dict[tuple[str, int], pd.Series]:
+        """
+        Incorpora um novo pregão (Series ticker -> fechamento) e devolve os
+        indicadores dele. Não altera self.values (ver docstring da classe).
+        """
+        x = row.reindex(self._columns).to_numpy(dtype=np.float64)
+        ok = np.isfinite(x)
+        xc = np.where(ok, x - self._shift, np.nan)
+
+        out = {}
+        for i, w in enumerate(self.windows):
+            if self._t >= w:
+                old = self._buf[(self._t - w) % self._wmax]
+                gone = np.isfinite(old)
+                self._sum[i] -= np.where(gone, old, 0.0)
+                self._sq[i] -= np.where(gone, old * old, 0.0)
+                self._cnt[i] -= gone
+            self._sum[i] += np.where(ok, xc, 0.0)
+            self._sq[i] += np.where(ok, xc * xc, 0.0)
+            self._cnt[i] += ok
+
+            a = 2.0 / (w + 1)
+            ema = self._ema[i]
+            self._ema[i] = np.where(ok, np.where(np.isnan(ema), x, a * x + (1 - a) * ema), ema)
+
+            cnt = self._cnt[i]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(cnt > 0, self._sum[i] / cnt, np.nan)
+                var = np.where(cnt > 1, np.maximum(self._sq[i] - self._sum[i] * mean, 0.0)
+                               / (cnt - 1), np.nan)
+            out[("mms", w)] = pd.Series(mean + self._shift, index=self._columns)
+            out[("mme", w)] = pd.Series(self._ema[i].copy(), index=self._columns)
+            out[("dp", w)] = pd.Series(np.sqrt(var), index=self._columns)
+
+        self._buf[self._t % self._wmax] = xc
+        self._t += 1
+        return out
+
+    def columns_for(self, ticker) -> pd.DataFrame:
+        """Indicadores de um ticker como colunas 'mms15', 'mme15', 'dp15', ..."""
+        return pd.DataFrame({f"{name}{w}": self.values[(name, w)][ticker]
+                             for w in self.windows for name in self.NAMES})
+
+
+
+def plot_year(df_year: pd.DataFrame, year: int, mms15: pd.Series, out: Path):
     s = df_year["close"]
-    mms15 = s.rolling(window=15, min_periods=1).mean()
+
+    import matplotlib.pyplot as plt
 
     fig, ax = plt.subplots(figsize=(10, 5), dpi=120)
     ax.plot(s.index, s.values, label="Fechamento", linewidth=1.1)
@@ -108,16 +380,16 @@ def plot_year(df_year: pd.DataFrame, year: int, outdir: Path):
     ax.set_ylabel("Preço (R$)")
     ax.grid(True, alpha=0.3)
     ax.legend()
-    out = outdir / f"petrobras_{year}_MMS15.png"
     fig.tight_layout()
     fig.savefig(out)
     plt.close(fig)
     return out
 
 
-def plot_overall(df: pd.DataFrame, outdir: Path, title: str):
+def plot_overall(df: pd.DataFrame, title: str, mms15: pd.Series, out: Path):
     s = df["close"]
-    mms15 = s.rolling(window=15, min_periods=1).mean()
+
+    import matplotlib.pyplot as plt
 
     fig, ax = plt.subplots(figsize=(12, 6), dpi=120)
     ax.plot(s.index, s.values, label="Fechamento", linewidth=0.9)
@@ -127,7 +399,6 @@ def plot_overall(df: pd.DataFrame, outdir: Path, title: str):
     ax.set_ylabel("Preço (R$)")
     ax.grid(True, alpha=0.3)
     ax.legend()
-    out = outdir / "petrobras_2008_2015_MMS15.png"
     fig.tight_layout()
     fig.savefig(out)
     plt.close(fig)
@@ -135,24 +406,87 @@ def plot_overall(df: pd.DataFrame, outdir: Path, title: str):
 
 
 
-def analyze_trend(df: pd.DataFrame):
-    
-    rows = []
-    for year, chunk in df.groupby("year"):
-        first = to_scalar(chunk["close"].iloc[0])     
-        last = to_scalar(chunk["close"].iloc[-1])     
-        delta = round(last - first, 2)
-        up = (last > first)                           
-        rows.append({
-            "ano": year,
-            "primeiro_dia": round(first, 2),
-            "ultimo_dia": round(last, 2),
-            "Δ(R$)": delta,
-            "Δ(%)": round(100 * (last / first - 1), 2) if first != 0 else None,
-            "subiu?": "SIM" if up else "NÃO",
-        })
-
-    out = pd.DataFrame(rows).sort_values("ano").reset_index(drop=True)
+# período -> (código do pandas, nome da coluna na tabela, rótulo do resumo)
+PERIODS = {
+    "year": ("Y", "ano", "do ANO"),
+    "quarter": ("Q", "trimestre", "do TRIMESTRE"),
+    "month": ("M", "mes", "do MÊS"),
+    "week": ("W", "semana", "da SEMANA"),
+}
+
+
+def period_first_last(panel: pd.DataFrame, period: str = "year"):
+    """
+    1º e último fechamento válidos de cada período para todos os tickers de
+    uma vez: retorna (primeiros, últimos), ambos DataFrames (períodos x tickers).
+    Sem NaN, é só indexar as linhas de borda de cada período; com NaN, cai
+    no groupby first/last (que pula valores ausentes).
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Período inválido: {period!r} (use {', '.join(PERIODS)}).")
+    if not panel.index.is_monotonic_increasing:
+        panel = panel.sort_index()
+    keys = pd.DatetimeIndex(panel.index).to_period(PERIODS[period][0])
+    x = panel.to_numpy(dtype=np.float64)
+
+    if not np.isnan(x).any():
+        starts = np.flatnonzero(np.r_[True, keys.asi8[1:] != keys.asi8[:-1]])
+        ends = np.r_[starts[1:] - 1, len(keys) - 1]
+        labels = keys[starts]
+        first = pd.DataFrame(x[starts], index=labels, columns=panel.columns)
+        last = pd.DataFrame(x[ends], index=labels, columns=panel.columns)
+        return first, last
+
+    g = panel.groupby(keys)
+    return g.first(), g.last()
+
+
+def trend_table(panel: pd.DataFrame, period: str = "year") -> pd.DataFrame:
+    """
+    Tabela 1º dia vs último dia por período para um painel (datas x tickers).
+    Com um único ticker sai no mesmo formato de sempre (texto simples); com
+    vários, ganha a coluna 'ticker' (ordenada por ticker e período) e as
+    colunas repetitivas viram categóricas. 'subiu?' fica ausente nos períodos
+    em que o ticker não tem fechamento.
+    """
+    first, last = period_first_last(panel, period)
+    label = PERIODS[period][1]
+    f = first.to_numpy()
+    l = last.to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.where(f != 0, 100 * (l / f - 1), np.nan)
+
+    n_per, n_tk = f.shape
+    per_codes = np.tile(np.arange(n_per), n_tk)
+    # período sem dado (f ou l NaN) fica sem resposta em 'subiu?', não "NÃO"
+    up_codes = np.where(np.isnan(f) | np.isnan(l), -1, l > f).T.ravel().astype(np.int8)
+    if period == "year":
+        periods = np.asarray(first.index.year, dtype=np.int64)[per_codes]
+    else:
+        periods = np.asarray(first.index.astype(str), dtype=object)[per_codes]
+    up = np.array([None, "NÃO", "SIM"], dtype=object)[up_codes + 1]
+    if n_tk > 1:
+        # colunas repetitivas viram categóricas (códigos inteiros, sem milhões de strings)
+        if period != "year":
+            periods = pd.Categorical.from_codes(per_codes, categories=first.index.astype(str))
+        up = pd.Categorical.from_codes(up_codes, categories=["NÃO", "SIM"])
+    out = pd.DataFrame({
+        label: periods,
+        "primeiro_dia": np.round(f.T.ravel(), 2),
+        "ultimo_dia": np.round(l.T.ravel(), 2),
+        "Δ(R$)": np.round((l - f).T.ravel(), 2),
+        "Δ(%)": np.round(pct.T.ravel(), 2),
+        "subiu?": up,
+    })
+    if n_tk > 1:
+        tk_codes = np.repeat(np.arange(n_tk), n_per)
+        out.insert(0, "ticker", pd.Categorical.from_codes(tk_codes, categories=panel.columns))
+    return out
+
+
+def analyze_trend(df: pd.DataFrame, period: str = "year"):
+
+    out = trend_table(df[["close"]], period)
 
     first_all = to_scalar(df["close"].iloc[0])
     last_all  = to_scalar(df["close"].iloc[-1])
@@ -161,38 +495,116 @@ def analyze_trend(df: pd.DataFrame):
 
 
 
+def export_prices(df_out: pd.DataFrame, path: Path) -> tuple[int, int]:
+    """
+    Grava preços + indicadores no armazenamento colunar (coluna 'date' +
+    colunas do frame). Se o que já está gravado é prefixo do novo (mesmas
+    colunas, datas e fechamentos), só os pregões novos são acrescentados;
+    senão a tabela é regravada. Retorna (linhas acrescentadas, total).
+    """
+    store = ColumnStore(path)
+    cols = {"date": df_out.index.values.astype("datetime64[D]"),
+            **{c: df_out[c].to_numpy() for c in df_out.columns}}
+    n = len(store)
+    if n:
+        old = store.read()
+        same = (set(old) == set(cols) and n <= len(df_out)
+                and np.array_equal(old["date"], cols["date"][:n])
+                and np.array_equal(old["close"], cols["close"][:n]))
+        del old   # solta os memmaps antes de mexer nos arquivos
+        if not same:
+            store.clear()
+            n = 0
+    if n == len(df_out):
+        return 0, n
+    return len(df_out) - n, store.append({k: v[n:] for k, v in cols.items()},
+                                         rows=len(df_out) - n)
+
+
+def window_arg(text: str) -> int:
+    """Tipo do argparse para --windows: inteiro >= 1."""
+    try:
+        w = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"janela inválida: {text!r} (use um inteiro)") from None
+    if w < 1:
+        raise argparse.ArgumentTypeError(f"janela inválida: {w} (precisa ser >= 1)")
+    return w
+
+
 def main():
     parser = argparse.ArgumentParser(description="Média Móvel Petrobras 2008–2015")
     parser.add_argument("--ticker", default="PETR4.SA", help="ex.: PETR4.SA ou PETR3.SA")
     parser.add_argument("--outdir", default="saidas_petrobras", help="pasta de saída")
     parser.add_argument("--csv", default=None, help="usar CSV local (contendo Date e Close)")
+    parser.add_argument("--cache", default="cache_precos",
+                        help="pasta do cache local de preços (.npz por ticker)")
+    parser.add_argument("--no-cache", action="store_true", help="ignora o cache e baixa tudo")
+    parser.add_argument("--offline", action="store_true",
+                        help="não acessa a rede: usa só o cache ou o --csv")
+    parser.add_argument("--period", default="year", choices=list(PERIODS),
+                        help="período do resumo 1º vs último dia (padrão=year)")
+    parser.add_argument("--windows", type=window_arg, nargs="+", default=[15],
+                        help="janelas de MMS/MME/DP (a de 15 dias é sempre incluída)")
+    parser.add_argument("--no-plots", action="store_true", help="pula a geração de gráficos")
+    parser.add_argument("--export-csv", action="store_true",
+                        help="também grava o CSV legível com preços e MMS")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos para renderizar gráficos (padrão=nº de CPUs)")
+    add_profile_args(parser)
     args = parser.parse_args()
 
     outdir = Path(args.outdir)
     os.makedirs(outdir, exist_ok=True)
 
-    df = get_prices(args.ticker, args.csv)
-
-    print("Gerando gráficos anuais (MMS 15 dias)...")
-    for year, chunk in df.groupby("year"):
-        p = plot_year(chunk, year, outdir)
-        print(f"  - {year}: {p.name}")
-
-    p_all = plot_overall(df, outdir, title=args.ticker if args.csv is None else "CSV local")
-    print(f"Gráfico geral salvo em: {p_all}")
-
-    tbl, first_all, last_all, overall_up = analyze_trend(df)
-    print("\nResumo — 1º dia vs último dia do ANO:")
-    print(tbl.to_string(index=False))
-    print(f"\nPeríodo completo 2008–2015: primeiro={first_all:.2f} | último={last_all:.2f} "
-          f"| subiu no geral? {overall_up}")
-
-    df_out = df.copy()
-    df_out["mms15"] = df_out["close"].rolling(15, min_periods=1).mean()
-    csv_path = outdir / "petrobras_2008_2015_mms15.csv"
-    df_out.to_csv(csv_path, index=True)
-    print(f"\nCSV com preços e MMS salvo em: {csv_path}")
-
+    with Profiler.from_args(args, "kkr") as prof:
+        with prof.stage("read"):
+            store = None if args.no_cache else PriceStore(args.cache)
+            df = get_prices(args.ticker, args.csv, store=store, offline=args.offline)
+
+        with prof.stage("indicators"):
+            engine = IndicatorEngine(windows=[15, *args.windows])
+            engine.fit(df[["close"]])
+            ind = engine.columns_for("close")
+
+        if args.no_plots:
+            print("Gráficos desativados (--no-plots).")
+        else:
+            with prof.stage("plots"):
+                jobs = [
+                    ChartJob(outdir / f"petrobras_{year}_MMS15.png", plot_year,
+                             dict(df_year=chunk, year=int(year),
+                                  mms15=ind.loc[chunk.index, "mms15"]))
+                    for year, chunk in df.groupby("year")
+                ]
+                jobs.append(ChartJob(outdir / "petrobras_2008_2015_MMS15.png", plot_overall,
+                                     dict(df=df, mms15=ind["mms15"],
+                                          title=args.ticker if args.csv is None else "CSV local")))
+                print("Gerando gráficos anuais (MMS 15 dias)...")
+                done = render_charts(jobs, workers=args.workers)
+            for (p, redrawn), job in zip(done[:-1], jobs):
+                print(f"  - {job.kwargs['year']}: {p.name}{'' if redrawn else ' (sem mudanças)'}")
+            print(f"Gráfico geral salvo em: {done[-1][0]}{'' if done[-1][1] else ' (sem mudanças)'}")
+
+        with prof.stage("signals"):
+            tbl, first_all, last_all, overall_up = analyze_trend(df, period=args.period)
+        print(f"\nResumo — 1º dia vs último dia {PERIODS[args.period][2]}:")
+        print(tbl.to_string(index=False))
+        print(f"\nPeríodo completo 2008–2015: primeiro={first_all:.2f} | último={last_all:.2f} "
+              f"| subiu no geral? {overall_up}")
+
+        df_out = df.join(ind)
+        with prof.stage("export"):
+            cols_path = outdir / "petrobras_2008_2015_mms15.cols"
+            added, total = export_prices(df_out, cols_path)
+        print(f"\nPreços e indicadores (colunar) em: {cols_path} "
+              f"(+{added} pregões, {total} no total)")
+
+        if args.export_csv:
+            with prof.stage("csv"):
+                csv_path = outdir / "petrobras_2008_2015_mms15.csv"
+                df_out.to_csv(csv_path, index=True)
+            print(f"CSV com preços e MMS salvo em: {csv_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,3 @@
+# comum — utilitários compartilhados pelos scripts do repositório.
+# Os scripts rodam de dentro das próprias pastas; eles colocam a raiz do
+# repositório no sys.path antes de importar daqui.
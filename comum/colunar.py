@@ -0,0 +1,139 @@
+# colunar.py
+# Saída binária colunar: uma pasta com um arquivo cru por coluna + schema.json.
+# Execuções acrescentam linhas no fim de cada arquivo; a leitura é por np.memmap
+# (zero cópia), sem reparsear texto.
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from comum.perfil import lazy_import
+
+np = lazy_import("numpy")
+
+SCHEMA = "schema.json"
+
+# tipos de tamanho fixo sem ponteiros: bool, inteiros, floats, complexos,
+# datas/intervalos e bytes/texto de largura fixa
+MAPPABLE_KINDS = "biufcmMSU"
+
+
+def check_dtype(name: str, dtype) -> None:
+    """ValueError se `dtype` não puder ser gravado cru e reaberto por memmap em outro processo."""
+    dtype = np.dtype(dtype)
+    if dtype.hasobject:
+        raise ValueError(f"Coluna {name!r}: dtype {dtype} guarda objetos Python "
+                         "(ponteiros), não dá para gravar em disco.")
+    if dtype.kind not in MAPPABLE_KINDS or dtype.names is not None or dtype.subdtype is not None:
+        raise ValueError(f"Coluna {name!r}: dtype {dtype} não é suportado "
+                         f"(use tipos simples: {MAPPABLE_KINDS}).")
+    if dtype.itemsize == 0 or np.dtype(dtype.str) != dtype:
+        raise ValueError(f"Coluna {name!r}: dtype {dtype} não tem representação fixa em disco.")
+
+
+def check_cast(name: str, src, dst) -> None:
+    """
+    ValueError se gravar `src` numa coluna `dst` perderia informação: exige
+    np.can_cast 'same_kind' (float em coluna int não passa) e, para texto e
+    datas, 'safe' (texto não pode ser truncado, data não pode perder resolução).
+    """
+    src, dst = np.dtype(src), np.dtype(dst)
+    rule = "safe" if dst.kind in "SUmM" or src.kind in "SUmM" else "same_kind"
+    if not np.can_cast(src, dst, rule):
+        raise ValueError(f"Coluna {name!r}: não dá para gravar {src} numa coluna {dst} "
+                         "sem perder dados.")
+
+
+class ColumnStore:
+    """
+    Tabela colunar em disco. Cada coluna tem dtype e formato por linha fixos
+    (ex.: float64 com 25 valores por linha) e vive em `<coluna>.bin`; o
+    schema.json guarda colunas e número de linhas. O schema só é atualizado
+    depois dos dados, então um append interrompido é descartado no próximo.
+
+        store = ColumnStore("saida/sinais.cols")
+        store.append({"score": scores_25, "concurso": 3199})
+        store.read()["score"]        # np.memmap (linhas x 25), só leitura
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def schema(self) -> dict:
+        try:
+            return json.loads((self.path / SCHEMA).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {"rows": 0, "columns": {}}
+
+    def __len__(self) -> int:
+        return self.schema()["rows"]
+
+    def _file(self, name: str) -> Path:
+        return self.path / f"{name}.bin"
+
+    def append(self, columns: dict, rows: int | None = None) -> int:
+        """
+        Acrescenta linhas. Sem `rows`, cada valor é UMA linha; com `rows`, cada
+        valor traz `rows` linhas no 1º eixo. Retorna o total de linhas.
+        """
+        if rows is None:
+            arrays = {k: np.asarray(v)[None, ...] for k, v in columns.items()}
+        else:
+            arrays = {k: np.asarray(v) for k, v in columns.items()}
+        n = {a.shape[0] for a in arrays.values()}
+        if len(n) != 1:
+            raise ValueError(f"Colunas com números de linhas diferentes: {sorted(n)}")
+        n = n.pop()
+
+        for k, a in arrays.items():
+            check_dtype(k, a.dtype)
+
+        schema = self.schema()
+        if not schema["columns"]:
+            schema["columns"] = {k: {"dtype": a.dtype.str, "shape": list(a.shape[1:])}
+                                 for k, a in arrays.items()}
+        elif set(arrays) != set(schema["columns"]):
+            raise ValueError(f"Colunas {sorted(arrays)} não batem com o schema "
+                             f"{sorted(schema['columns'])} de {self.path}.")
+
+        # valida tudo antes de escrever qualquer coluna
+        for k, a in arrays.items():
+            spec = schema["columns"][k]
+            if list(a.shape[1:]) != spec["shape"]:
+                raise ValueError(f"Coluna {k!r}: formato {a.shape[1:]} != {tuple(spec['shape'])}.")
+            check_cast(k, a.dtype, spec["dtype"])
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        for k, a in arrays.items():
+            spec = schema["columns"][k]
+            dtype = np.dtype(spec["dtype"])
+            row_bytes = dtype.itemsize * int(np.prod(spec["shape"], dtype=np.int64))
+            with open(self._file(k), "ab") as f:
+                f.truncate(schema["rows"] * row_bytes)   # descarta sobra de append interrompido
+                f.write(np.ascontiguousarray(a, dtype=dtype).tobytes())
+
+        schema["rows"] += n
+        tmp = self.path / (SCHEMA + ".tmp")
+        tmp.write_text(json.dumps(schema, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path / SCHEMA)
+        return schema["rows"]
+
+    def read(self) -> dict:
+        """Todas as colunas como np.memmap somente leitura (linhas x formato da coluna)."""
+        schema = self.schema()
+        out = {}
+        for k, spec in schema["columns"].items():
+            check_dtype(k, spec["dtype"])   # schema.json editado à mão não vira segfault
+            shape = (schema["rows"], *spec["shape"])
+            if schema["rows"] == 0:
+                out[k] = np.empty(shape, dtype=spec["dtype"])
+            else:
+                out[k] = np.memmap(self._file(k), dtype=spec["dtype"], mode="r", shape=shape)
+        return out
+
+    def clear(self) -> None:
+        for k in self.schema()["columns"]:
+            self._file(k).unlink(missing_ok=True)
+        (self.path / SCHEMA).unlink(missing_ok=True)
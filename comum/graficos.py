@@ -0,0 +1,112 @@
+# graficos.py
+# Etapa de renderização: despacha gráficos para um pool de processos (backend Agg)
+# e pula os PNGs cujas entradas (dados + parâmetros + código) não mudaram.
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+MANIFEST = ".graficos_hash.json"
+
+
+@dataclass
+class ChartJob:
+    """
+    Um gráfico: render_charts chama func(**kwargs, out=out), então o nome do
+    PNG existe só aqui e o teste de "sem mudanças" olha o arquivo certo.
+    """
+    out: Path
+    func: Callable
+    kwargs: dict = field(default_factory=dict)
+
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _feed(h, value):
+    """Alimenta o hash com um argumento; pandas/numpy entram pelo conteúdo, o resto por repr."""
+    if hasattr(value, "to_numpy") and hasattr(value, "index"):
+        import pandas as pd
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        cols = getattr(value, "columns", [getattr(value, "name", None)])
+        h.update(repr(list(cols)).encode())
+    elif hasattr(value, "tobytes"):
+        h.update(value.tobytes())
+    else:
+        h.update(repr(value).encode())
+
+
+def job_hash(job: ChartJob) -> str:
+    h = hashlib.sha256()
+    h.update(f"{job.func.__module__}.{job.func.__qualname__}".encode())
+    h.update(str(job.out).encode())
+    try:
+        h.update(inspect.getsource(job.func).encode())   # mudou o código, redesenha
+    except (OSError, TypeError):
+        pass
+    for k in sorted(job.kwargs):
+        h.update(k.encode())
+        _feed(h, job.kwargs[k])
+    return h.hexdigest()
+
+
+def _init_worker():
+    # workers criados por fork herdam o tracemalloc do --profile-mem; sem isso
+    # pagariam o custo do rastreio sem que a memória deles fosse reportada
+    import tracemalloc
+    tracemalloc.stop()
+    _use_agg()
+
+
+def _run(job: ChartJob):
+    _use_agg()
+    return job.func(**job.kwargs, out=job.out)
+
+
+def render_charts(jobs: list[ChartJob], workers: int | None = None,
+                  force: bool = False) -> list[tuple[Path, bool]]:
+    """
+    Renderiza os jobs cujo hash mudou (ou cujo PNG sumiu) e devolve
+    [(png, redesenhado?)] na ordem dos jobs. Os hashes ficam num manifesto
+    JSON por pasta de saída. Com um job pendente (ou workers=1) roda no
+    próprio processo, sem pagar o custo de subir o pool.
+    """
+    manifests: dict[Path, dict] = {}
+    for job in jobs:
+        d = Path(job.out).parent
+        if d not in manifests:
+            try:
+                manifests[d] = json.loads((d / MANIFEST).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                manifests[d] = {}
+
+    hashes = [job_hash(job) for job in jobs]
+    pending = [i for i, (job, hx) in enumerate(zip(jobs, hashes))
+               if force or not Path(job.out).exists()
+               or manifests[Path(job.out).parent].get(Path(job.out).name) != hx]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pending))
+    if workers <= 1:
+        for i in pending:
+            _run(jobs[i])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            list(pool.map(_run, [jobs[i] for i in pending]))
+
+    for i in pending:
+        out = Path(jobs[i].out)
+        manifests[out.parent][out.name] = hashes[i]
+    for d in {Path(jobs[i].out).parent for i in pending}:
+        (d / MANIFEST).write_text(json.dumps(manifests[d], indent=2, sort_keys=True), encoding="utf-8")
+
+    done = set(pending)
+    return [(Path(job.out), i in done) for i, job in enumerate(jobs)]
@@ -0,0 +1,168 @@
+# perfil.py
+# Instrumentação compartilhada: imports pesados preguiçosos e medição por etapa
+# (tempo de parede, tempo de CPU e pico de memória), ligada com --profile;
+# o rastreio de alocações (tracemalloc, bem mais lento) só com --profile-mem.
+
+import argparse
+import cProfile
+import importlib.util
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+
+def lazy_import(name: str):
+    """
+    Devolve o módulo `name` sem importá-lo: o import de verdade só acontece no
+    primeiro acesso a um atributo. Pacote não instalado levanta ModuleNotFoundError
+    na hora, como um import normal.
+    Nos scripts, combine com `from __future__ import annotations` para que as
+    anotações (pd.DataFrame etc.) não disparem o import na definição das funções.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="JSON",
+                        help="mede cada etapa (parede, CPU, pico de RSS) e grava em JSON "
+                             "(padrão: perfil_<script>.json)")
+    parser.add_argument("--profile-mem", action="store_true",
+                        help="com --profile, rastreia também o pico de alocações de cada "
+                             "etapa (tracemalloc; deixa o código bem mais lento)")
+    parser.add_argument("--cprofile", default=None, metavar="ARQ",
+                        help="grava também a saída do cProfile (abrir com pstats/snakeviz)")
+
+
+def max_rss_mb() -> float | None:
+    """
+    Pico de RSS (MB) do processo e dos filhos já encerrados (ex.: pool de
+    gráficos depois do shutdown). None onde não há `resource` (Windows).
+    """
+    if resource is None:
+        return None
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+class Profiler:
+    """
+    Mede etapas nomeadas de um script. Desligado, stage() não faz nada.
+    Etapas repetidas acumulam tempo. A memória sai sem custo de ru_maxrss
+    ('rss_max_mb', pico do processo até o fim da etapa, que só cresce). Com
+    trace_mem=True (--profile-mem), o tracemalloc mede também o pico de
+    alocações Python de cada etapa ('traced_peak_mb'); isso distorce os tempos,
+    e os processos do pool de gráficos não são rastreados.
+
+        with Profiler.from_args(args, "kkr") as prof:
+            with prof.stage("read"):
+                ...
+    """
+
+    def __init__(self, script: str, enabled: bool = False, json_path: str | None = None,
+                 cprofile_path: str | None = None, trace_mem: bool = False):
+        self.script = script
+        self.enabled = enabled
+        self.trace_mem = enabled and trace_mem
+        self.json_path = Path(json_path or f"perfil_{script}.json")
+        self.cprofile_path = cprofile_path
+        self.stages: dict[str, dict] = {}
+        self._peaks: list[int] = []
+        self._cprof = None
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, script: str) -> "Profiler":
+        return cls(script, enabled=args.profile is not None, json_path=args.profile or None,
+                   cprofile_path=args.cprofile, trace_mem=args.profile_mem)
+
+    def __enter__(self):
+        if self.trace_mem:
+            tracemalloc.start()
+        if self.enabled:
+            self._t0 = (time.perf_counter(), time.process_time())
+        if self.cprofile_path:
+            self._cprof = cProfile.Profile()
+            self._cprof.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._cprof is not None:
+            self._cprof.disable()
+            self._cprof.dump_stats(self.cprofile_path)
+            print(f"cProfile salvo em: {self.cprofile_path}")
+        if self.enabled:
+            total = {"wall_s": time.perf_counter() - self._t0[0],
+                     "cpu_s": time.process_time() - self._t0[1],
+                     "rss_max_mb": max_rss_mb()}
+            if self.trace_mem:
+                total["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            self._report(total)
+        return False
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        if self.trace_mem:
+            # o pico da etapa externa precisa sobreviver ao reset da interna
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - w0
+            cpu = time.process_time() - c0
+            st = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            st["calls"] += 1
+            st["wall_s"] += wall
+            st["cpu_s"] += cpu
+            st["rss_max_mb"] = max_rss_mb()
+            if self.trace_mem:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                st["traced_peak_mb"] = max(st.get("traced_peak_mb", 0.0), peak / 2**20)
+
+    def _report(self, total: dict) -> None:
+        data = {
+            "script": self.script,
+            "total": total,
+            "stages": [{"name": k, **v} for k, v in self.stages.items()],
+        }
+        self.json_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+        def mb(v):
+            return f"{v:>10.1f}" if v is not None else f"{'-':>10}"
+
+        print(f"\n=== Perfil — {self.script} ===")
+        print(f"{'etapa':<14}{'chamadas':>9}{'parede(s)':>11}{'CPU(s)':>9}{'RSS(MB)':>10}"
+              + (f"{'alocado(MB)':>12}" if self.trace_mem else ""))
+        for row in data["stages"] + [{"name": "TOTAL", "calls": 1, **total}]:
+            print(f"{row['name']:<14}{row['calls']:>9}{row['wall_s']:>11.3f}"
+                  f"{row['cpu_s']:>9.3f}{mb(row['rss_max_mb'])}"
+                  + (f"{row['traced_peak_mb']:>12.1f}" if self.trace_mem else ""))
+        print(f"Perfil salvo em: {self.json_path}")
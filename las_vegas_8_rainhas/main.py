@@ -1,9 +1,14 @@
 # n_queens_las_vegas.py
 import random
+import sys
 import time
 import argparse
+from pathlib import Path
 from typing import List, Optional, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from comum.perfil import Profiler, add_profile_args
+
 # ---------- util ----------
 def is_valid(cols: List[int]) -> bool:
     
@@ -124,10 +129,17 @@ def main():
     ap.add_argument("--seed", type=int, default=42, help="seed do RNG")
     ap.add_argument("--bt_runs", type=int, default=3,
                     help="quantas vezes cronometrar o backtracking")
+    add_profile_args(ap)
     args = ap.parse_args()
 
+    with Profiler.from_args(args, "las_vegas_8_rainhas") as prof:
+        run(args, prof)
+
+
+def run(args, prof):
     # Las Vegas
-    lv = las_vegas_stats(args.n, args.lv_runs, seed=args.seed)
+    with prof.stage("las_vegas"):
+        lv = las_vegas_stats(args.n, args.lv_runs, seed=args.seed)
     print("\n=== Las Vegas ===")
     print(f"N={args.n} | rodadas={args.lv_runs}")
     print(f"Média de tentativas: {lv['avg_attempts']:.2f} "
@@ -138,7 +150,8 @@ def main():
     print(pretty_board(lv["last_solution"]))
 
     # Backtracking
-    bt = backtracking_benchmark(args.n, runs=args.bt_runs)
+    with prof.stage("backtracking"):
+        bt = backtracking_benchmark(args.n, runs=args.bt_runs)
     print("\n=== Backtracking ===")
     print(f"N={args.n} | runs={args.bt_runs}")
     print(f"Tempo médio: {bt['avg_time_s']:.6f}s")
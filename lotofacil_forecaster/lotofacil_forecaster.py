@@ -1,15 +1,26 @@
+from __future__ import annotations
+
 import argparse
 from pathlib import Path
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from comum.colunar import ColumnStore
+from comum.graficos import ChartJob, render_charts
+from comum.perfil import Profiler, add_profile_args, lazy_import
+
+# numpy/pandas carregam no 1º uso; matplotlib e statsmodels só nas etapas que usam
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 
-try:
-    from statsmodels.tsa.ar_model import AutoReg
-    HAVE_SM = True
-except Exception:
-    HAVE_SM = False
+def _autoreg():
+    """Importa o AutoReg do statsmodels só quando o AR(1) vai rodar (None se indisponível)."""
+    try:
+        from statsmodels.tsa.ar_model import AutoReg
+        return AutoReg
+    except Exception:
+        return None
 
 
 
@@ -73,10 +84,11 @@ def moving_average_signal(ind: pd.DataFrame, window: int = 20) -> pd.Series:
 
 def ar1_signal(ind: pd.DataFrame) -> pd.Series:
     
+    AutoReg = _autoreg()
     preds = []
     for c in ind.columns:
         y = ind[c].astype(float).values
-        if HAVE_SM and len(y) >= 10 and np.any(y) and np.any(1 - y):
+        if AutoReg is not None and len(y) >= 10 and np.any(y) and np.any(1 - y):
             try:
                 model = AutoReg(y, lags=1, old_names=False)
                 res = model.fit()
@@ -103,6 +115,25 @@ def combine_scores(freq: pd.Series, ma: pd.Series, ar: pd.Series,
     return w_freq * freq + w_ma * ma + w_ar * ar
 
 
+def export_signals(path: Path, concurso: int, window: int, weights, freq: pd.Series,
+                   ma: pd.Series, ar: pd.Series, score: pd.Series) -> int:
+    """
+    Acrescenta uma linha por execução ao armazenamento colunar, com os sinais em
+    precisão total (vetores de 25 posições, dezena 1 na posição 0).
+    Retorna quantas execuções o histórico já tem.
+    """
+    return ColumnStore(path).append({
+        "executado_em": np.datetime64("now", "s"),
+        "concurso": np.int64(concurso),
+        "window": np.int64(window),
+        "pesos": np.asarray(weights, dtype=np.float64),
+        "freq_hist": freq.to_numpy(np.float64),
+        "mms": ma.to_numpy(np.float64),
+        "ar_score": ar.to_numpy(np.float64),
+        "score_final": score.to_numpy(np.float64),
+    })
+
+
 # ===================== PALPITES =====================
 def make_ticket_from_scores(score: pd.Series, k=15) -> list[int]:
     """Seleciona as k dezenas com maior score."""
@@ -125,28 +156,29 @@ def diversify_tickets(base_score: pd.Series, n_extra=3, k=15,
 
 
 
-def plot_frequency(ind: pd.DataFrame, outdir: Path):
+def plot_frequency(ind: pd.DataFrame, out: Path):
     freq = ind.mean(axis=0)
     xs = np.arange(1, 26)
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 4), dpi=120)
     plt.bar(xs, freq.values, width=0.8)
     plt.xticks(xs)
     plt.title("Lotofácil — Frequência histórica por dezena")
     plt.xlabel("Dezena")
     plt.ylabel("Proporção de sorteios")
-    out = outdir / "frequencia_historica.png"
     plt.tight_layout()
     plt.savefig(out)
     plt.close()
     return out
 
 
-def plot_trend(ind: pd.DataFrame, window=20, outdir: Path | None = None):
+def plot_trend(ind: pd.DataFrame, window=20, out: Path | None = None):
     
     freq = ind.mean(axis=0)
     top = freq.sort_values(ascending=False).index[:5]
     roll = ind[top].rolling(window=window, min_periods=1).mean()
 
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(10, 4), dpi=120)  
     roll.plot(ax=ax)                                  
     ax.set_title(f"Média móvel ({window}) das dezenas mais frequentes")
@@ -154,9 +186,7 @@ def plot_trend(ind: pd.DataFrame, window=20, outdir: Path | None = None):
     ax.set_ylabel("Proporção")
     ax.legend([t.replace('d', 'dez ') for t in top], loc='best')
 
-    out = None
-    if outdir is not None:
-        out = outdir / f"tendencia_mms{window}.png"
+    if out is not None:
         fig.tight_layout()
         fig.savefig(out)
         plt.close(fig)
@@ -177,56 +207,79 @@ def main():
     ap.add_argument("--wa", type=float, default=0.30, help="Peso do autoregressivo")
     ap.add_argument("--extras", type=int, default=3, help="Qtde de jogos extra (diversificados)")
     ap.add_argument("--outdir", default="saida_lotofacil", help="Pasta de saída")
+    ap.add_argument("--no-plots", action="store_true", help="Não gera os gráficos")
+    ap.add_argument("--export-csv", action="store_true",
+                    help="Também grava sinais_e_scores.csv (legível, arredondado)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Processos para renderizar gráficos (padrão=nº de CPUs)")
+    add_profile_args(ap)
     args = ap.parse_args()
 
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    
-    draws = read_draws_xlsx(args.xlsx)
-    ind = to_indicator_matrix(draws)
-
-    
-    freq = freq_signal(ind)
-    ma = moving_average_signal(ind, window=args.window)
-    ar = ar1_signal(ind)
-
-    
-    score = combine_scores(freq, ma, ar, w_freq=args.wf, w_ma=args.wm, w_ar=args.wa)
-
-   
-    principal = make_ticket_from_scores(score, k=15)
-    extras = diversify_tickets(score, n_extra=args.extras, k=15)
-
-    
-    f1 = plot_frequency(ind, outdir)
-    f2 = plot_trend(ind, window=args.window, outdir=outdir)
-
-    
-    print("\n=== Relatório — sinais por dezena (1..25) ===")
-    table = pd.DataFrame({
-        "dezena": [int(c[1:]) for c in score.index],
-        "freq_hist": np.round(freq.values, 4),
-        f"mms_{args.window}": np.round(ma.values, 4),
-        "ar_score": np.round(ar.values, 4),
-        "score_final": np.round(score.values, 5)
-    }).sort_values("score_final", ascending=False).reset_index(drop=True)
-    print(table.to_string(index=False))
-
-    print("\nPalpite principal:", principal)
-    for i, t in enumerate(extras, 1):
-        print(f"Variação #{i}:", t)
-
-    out_csv = outdir / "sinais_e_scores.csv"
-    table.to_csv(out_csv, index=False)
-
-    print(f"\nArquivos salvos em: {outdir}")
-    print(f" - Frequência: {f1}")
-    print(f" - Tendência:  {f2}")
-    print(f" - Sinais CSV: {out_csv}")
-
-    print("\n⚠️ Aviso didático: Loterias são essencialmente aleatórias; "
-          "isso é uma heurística para estudo (freq + média móvel + AR), sem garantia de acerto.")
+    with Profiler.from_args(args, "lotofacil_forecaster") as prof:
+        with prof.stage("read"):
+            draws = read_draws_xlsx(args.xlsx)
+
+        with prof.stage("indicators"):
+            ind = to_indicator_matrix(draws)
+
+        with prof.stage("signals"):
+            freq = freq_signal(ind)
+            ma = moving_average_signal(ind, window=args.window)
+            ar = ar1_signal(ind)
+            score = combine_scores(freq, ma, ar, w_freq=args.wf, w_ma=args.wm, w_ar=args.wa)
+
+        with prof.stage("tickets"):
+            principal = make_ticket_from_scores(score, k=15)
+            extras = diversify_tickets(score, n_extra=args.extras, k=15)
+
+        if args.no_plots:
+            f1 = f2 = "(desativado, --no-plots)"
+        else:
+            with prof.stage("plots"):
+                (f1, _), (f2, _) = render_charts([
+                    ChartJob(outdir / "frequencia_historica.png", plot_frequency,
+                             dict(ind=ind)),
+                    ChartJob(outdir / f"tendencia_mms{args.window}.png", plot_trend,
+                             dict(ind=ind, window=args.window)),
+                ], workers=args.workers)
+
+        with prof.stage("export"):
+            out_cols = outdir / "sinais.cols"
+            n_runs = export_signals(out_cols, concurso=ind.index[-1], window=args.window,
+                                    weights=(args.wf, args.wm, args.wa),
+                                    freq=freq, ma=ma, ar=ar, score=score)
+
+        print("\n=== Relatório — sinais por dezena (1..25) ===")
+        table = pd.DataFrame({
+            "dezena": [int(c[1:]) for c in score.index],
+            "freq_hist": np.round(freq.values, 4),
+            f"mms_{args.window}": np.round(ma.values, 4),
+            "ar_score": np.round(ar.values, 4),
+            "score_final": np.round(score.values, 5)
+        }).sort_values("score_final", ascending=False).reset_index(drop=True)
+        print(table.to_string(index=False))
+
+        out_csv = "(desativado, use --export-csv)"
+        if args.export_csv:
+            with prof.stage("csv"):
+                out_csv = outdir / "sinais_e_scores.csv"
+                table.to_csv(out_csv, index=False)
+
+        print("\nPalpite principal:", principal)
+        for i, t in enumerate(extras, 1):
+            print(f"Variação #{i}:", t)
+
+        print(f"\nArquivos salvos em: {outdir}")
+        print(f" - Frequência: {f1}")
+        print(f" - Tendência:  {f2}")
+        print(f" - Sinais:     {out_cols} ({n_runs} execuções)")
+        print(f" - Sinais CSV: {out_csv}")
+
+        print("\n⚠️ Aviso didático: Loterias são essencialmente aleatórias; "
+              "isso é uma heurística para estudo (freq + média móvel + AR), sem garantia de acerto.")
 
 
 if __name__ == "__main__":
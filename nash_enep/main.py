@@ -1,5 +1,11 @@
+import argparse
+import sys
+from pathlib import Path
 from typing import List, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from comum.perfil import Profiler, add_profile_args
+
 # Matriz 2x3 do enunciado: 
 JOGO_ENTRADA: List[List[Tuple[int, int]]] = [
     [(2, 1), (1, 0), (1, 0)],   # L1: Investe
@@ -39,9 +45,15 @@ def encontrar_nash(matriz: List[List[Tuple[float, float]]]) -> List[Tuple[int, i
 
 
 def main() -> None:
-    print("Jogo: Prevenção de Entrada (2x3)")
-    eneps = encontrar_nash(JOGO_ENTRADA)
-    print(f"O Equilíbrio de Nash em Estratégias Puras (ENEP) é encontrado nas coordenadas (Linha, Coluna): {eneps}")
+    ap = argparse.ArgumentParser(description="Busca de ENEP em jogo bimatricial")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    with Profiler.from_args(args, "nash_enep") as prof:
+        print("Jogo: Prevenção de Entrada (2x3)")
+        with prof.stage("enep"):
+            eneps = encontrar_nash(JOGO_ENTRADA)
+        print(f"O Equilíbrio de Nash em Estratégias Puras (ENEP) é encontrado nas coordenadas (Linha, Coluna): {eneps}")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,10 @@
+import argparse
 import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from comum.perfil import Profiler, add_profile_args
 
 GRAFO = {
     "Quatro Barras": [
@@ -121,18 +127,24 @@ def buscar_rota_las_vegas(origem, destino, max_tentativas=100000):
 ## =========T==========#
 
 def main():
+    ap = argparse.ArgumentParser(description="Rota aérea Quatro Barras -> Boca Raton (Las Vegas)")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
     origem = "Quatro Barras"
     destino = "Boca Raton"
 
-    caminho, custo, paradas = buscar_rota_las_vegas(origem, destino)
-
-    if caminho is None:
-        print("Nenhuma rota que satisfaça as restrições foi encontrada.")
-    else:
-        print("Rota encontrada:")
-        print(" -> ".join(caminho))
-        print(f"Custo total: {custo}")
-        print(f"Paradas: {paradas}")
+    with Profiler.from_args(args, "grafo") as prof:
+        with prof.stage("busca"):
+            caminho, custo, paradas = buscar_rota_las_vegas(origem, destino)
+
+        if caminho is None:
+            print("Nenhuma rota que satisfaça as restrições foi encontrada.")
+        else:
+            print("Rota encontrada:")
+            print(" -> ".join(caminho))
+            print(f"Custo total: {custo}")
+            print(f"Paradas: {paradas}")
     ## =========TESTES==========#
     # rotas = todas_rotas_validas(GRAFO, origem, destino,
     #                         max_paradas=6, max_custo=15000)
@@ -0,0 +1,8 @@
+# Os scripts rodam de dentro das próprias pastas; os testes importam os
+# módulos do mesmo jeito, colocando essas pastas no sys.path.
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for sub in ("", "Petrobras_MMS15"):
+    sys.path.insert(0, str(ROOT / sub))
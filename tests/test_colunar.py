@@ -0,0 +1,119 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import kkr
+from comum.colunar import ColumnStore
+from conftest import ROOT
+
+
+def sample(rows, start=0):
+    return {
+        "t": np.arange(start, start + rows).astype("datetime64[D]"),
+        "score": np.arange(start, start + rows, dtype=np.float64)[:, None] * np.ones(25),
+        "n": np.arange(start, start + rows, dtype=np.int64),
+    }
+
+
+def test_append_read_round_trip(tmp_path):
+    store = ColumnStore(tmp_path / "s.cols")
+    assert store.read() == {} and len(store) == 0
+
+    store.append(sample(3), rows=3)
+    assert store.append({"t": np.datetime64(3, "D"), "score": np.full(25, 3.0),
+                         "n": np.int64(3)}) == 4
+
+    cols = store.read()
+    assert all(isinstance(v, np.memmap) for v in cols.values())
+    expected = sample(4)
+    for k, v in expected.items():
+        np.testing.assert_array_equal(cols[k], v)
+    assert cols["score"].shape == (4, 25)
+
+
+def test_read_from_fresh_process(tmp_path):
+    path = tmp_path / "s.cols"
+    ColumnStore(path).append(sample(5), rows=5)
+    code = ("import sys; sys.path.insert(0, sys.argv[1]);"
+            "from comum.colunar import ColumnStore;"
+            "c = ColumnStore(sys.argv[2]).read(); print(float(c['score'].sum()), int(c['n'][-1]))")
+    out = subprocess.run([sys.executable, "-c", code, str(ROOT), str(path)],
+                         capture_output=True, text=True, check=True).stdout.split()
+    assert out == [str(float(sample(5)["score"].sum())), "4"]
+
+
+def test_interrupted_append_is_truncated(tmp_path):
+    store = ColumnStore(tmp_path / "s.cols")
+    store.append(sample(2), rows=2)
+    # simula um append que gravou dados mas morreu antes do schema
+    with open(tmp_path / "s.cols" / "n.bin", "ab") as f:
+        f.write(np.arange(7, dtype=np.int64).tobytes())
+    np.testing.assert_array_equal(store.read()["n"], [0, 1])
+
+    store.append(sample(1, start=2), rows=1)
+    assert (tmp_path / "s.cols" / "n.bin").stat().st_size == 3 * 8
+    np.testing.assert_array_equal(store.read()["n"], [0, 1, 2])
+
+
+@pytest.mark.parametrize("bad", [
+    np.array(["x", "y"], dtype=object),
+    np.zeros(2, dtype=[("a", "f8")]),
+    np.zeros(2, dtype="V8"),
+])
+def test_unmappable_dtypes_are_rejected(tmp_path, bad):
+    store = ColumnStore(tmp_path / "s.cols")
+    with pytest.raises(ValueError):
+        store.append({"a": bad}, rows=2)
+    assert len(store) == 0 and not (tmp_path / "s.cols" / "a.bin").exists()
+
+
+def test_lossy_casts_are_rejected(tmp_path):
+    store = ColumnStore(tmp_path / "s.cols")
+    store.append({"i": np.array([1, 2]), "s": np.array(["ab", "c"])}, rows=2)
+
+    with pytest.raises(ValueError):
+        store.append({"i": np.array([2.9]), "s": np.array(["d"])}, rows=1)
+    with pytest.raises(ValueError):
+        store.append({"i": np.array([3]), "s": np.array(["abc"])}, rows=1)
+    assert len(store) == 2
+
+    store.append({"i": np.array([3], dtype=np.int32), "s": np.array(["d"])}, rows=1)
+    np.testing.assert_array_equal(store.read()["i"], [1, 2, 3])
+    np.testing.assert_array_equal(store.read()["s"], ["ab", "c", "d"])
+
+
+def price_table(n, windows=(15,)):
+    idx = pd.bdate_range("2010-01-01", periods=n)
+    df = kkr.price_frame(pd.Series(np.linspace(10, 20, n), index=idx))
+    engine = kkr.IndicatorEngine(windows)
+    engine.fit(df[["close"]])
+    return df.join(engine.columns_for("close"))
+
+
+def test_export_prices_appends_only_new_rows(tmp_path):
+    path = tmp_path / "p.cols"
+    full = price_table(120)
+    assert kkr.export_prices(full.iloc[:100], path) == (100, 100)
+    assert kkr.export_prices(full, path) == (20, 120)
+    assert kkr.export_prices(full, path) == (0, 120)
+
+    cols = ColumnStore(path).read()
+    np.testing.assert_array_equal(cols["date"], full.index.values.astype("datetime64[D]"))
+    np.testing.assert_allclose(cols["mms15"], full["mms15"])
+
+
+def test_export_prices_rewrites_when_history_changes(tmp_path):
+    path = tmp_path / "p.cols"
+    kkr.export_prices(price_table(100), path)
+
+    changed = price_table(100)
+    changed.iloc[10, changed.columns.get_loc("close")] += 1
+    assert kkr.export_prices(changed, path) == (100, 100)
+    assert ColumnStore(path).read()["close"][10] == changed["close"].iloc[10]
+
+    other_windows = price_table(100, windows=(15, 30))
+    assert kkr.export_prices(other_windows, path) == (100, 100)
+    assert "mms30" in ColumnStore(path).read()
@@ -0,0 +1,28 @@
+import numpy as np
+
+from comum.graficos import ChartJob, render_charts
+
+
+def write_sum(values, out):
+    out.write_text(str(float(np.sum(values))))
+    return out
+
+
+def test_unchanged_jobs_are_skipped(tmp_path):
+    job = ChartJob(tmp_path / "soma.png", write_sum, dict(values=np.arange(5)))
+    assert render_charts([job], workers=1) == [(job.out, True)]
+    assert job.out.read_text() == "10.0"
+
+    assert render_charts([job], workers=1) == [(job.out, False)]
+
+    changed = ChartJob(job.out, write_sum, dict(values=np.arange(6)))
+    assert render_charts([changed], workers=1) == [(job.out, True)]
+    assert job.out.read_text() == "15.0"
+
+
+def test_missing_png_is_redrawn(tmp_path):
+    job = ChartJob(tmp_path / "soma.png", write_sum, dict(values=np.arange(3)))
+    render_charts([job], workers=1)
+    job.out.unlink()
+    assert render_charts([job], workers=1) == [(job.out, True)]
+    assert job.out.exists()
@@ -0,0 +1,79 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import kkr
+
+WINDOWS = (3, 15, 40)
+
+
+def make_panel(with_nan: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    idx = pd.bdate_range("2010-01-01", periods=300)
+    panel = pd.DataFrame(30 + rng.normal(size=(300, 4)).cumsum(axis=0),
+                         index=idx, columns=["PETR3", "PETR4", "VALE3", "ITUB4"])
+    if with_nan:
+        panel.iloc[:60, 1] = np.nan     # ticker que começa a negociar depois
+        panel.iloc[120:127, 2] = np.nan  # pregões faltando no meio
+        panel.iloc[200, 3] = np.nan
+    return panel
+
+
+def assert_close(got, expected):
+    np.testing.assert_allclose(np.asarray(got, dtype=float), np.asarray(expected, dtype=float),
+                               rtol=0, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("with_nan", [False, True])
+def test_fit_matches_pandas(with_nan):
+    panel = make_panel(with_nan)
+    values = kkr.IndicatorEngine(WINDOWS).fit(panel)
+    for w in WINDOWS:
+        roll = panel.rolling(w, min_periods=1)
+        assert_close(values[("mms", w)], roll.mean())
+        assert_close(values[("dp", w)], roll.std())
+        assert_close(values[("mme", w)], panel.ewm(span=w, adjust=False, ignore_na=True).mean())
+
+
+@pytest.mark.parametrize("with_nan", [False, True])
+@pytest.mark.parametrize("k", [1, 10, 59, 150])
+def test_update_matches_full_fit(with_nan, k):
+    panel = make_panel(with_nan)
+    full = kkr.IndicatorEngine(WINDOWS).fit(panel)
+
+    engine = kkr.IndicatorEngine(WINDOWS)
+    engine.fit(panel.iloc[:k])
+    for date, row in panel.iloc[k:].iterrows():
+        out = engine.update(row)
+        for key, series in out.items():
+            assert_close(series, full[key].loc[date])
+    # update() só transmite: values continua sendo o do fit()
+    assert all(len(v) == k for v in engine.values.values())
+
+
+def test_update_from_empty_fit():
+    panel = make_panel(with_nan=True)
+    full = kkr.IndicatorEngine(WINDOWS).fit(panel)
+
+    engine = kkr.IndicatorEngine(WINDOWS)
+    empty = engine.fit(panel.iloc[:0])
+    assert all(v.empty for v in empty.values())
+    for date, row in panel.iterrows():
+        out = engine.update(row)
+    for key, series in out.items():
+        assert_close(series, full[key].loc[date])
+
+
+@pytest.mark.parametrize("windows", [[0], [15, -3], []])
+def test_invalid_windows_rejected(windows):
+    with pytest.raises(ValueError):
+        kkr.IndicatorEngine(windows)
+
+
+@pytest.mark.parametrize("text", ["0", "-5", "x"])
+def test_window_arg_rejects_non_positive(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        kkr.window_arg(text)
+    assert kkr.window_arg("30") == 30
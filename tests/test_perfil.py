@@ -0,0 +1,78 @@
+import builtins
+import json
+import sys
+import time
+
+import pytest
+
+from comum.perfil import Profiler, lazy_import
+
+
+def test_nested_and_repeated_stages_accumulate(tmp_path, capsys):
+    out = tmp_path / "perfil.json"
+    with Profiler("teste", enabled=True, json_path=out) as prof:
+        for _ in range(3):
+            with prof.stage("externa"):
+                time.sleep(0.01)
+                with prof.stage("interna"):
+                    time.sleep(0.02)
+        with prof.stage("interna"):
+            time.sleep(0.02)
+
+    st = prof.stages
+    assert st["externa"]["calls"] == 3 and st["interna"]["calls"] == 4
+    assert st["interna"]["wall_s"] >= 4 * 0.02
+    # a externa inclui o tempo da interna aninhada
+    assert st["externa"]["wall_s"] >= 3 * (0.01 + 0.02)
+    assert "Perfil salvo em" in capsys.readouterr().out
+
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["script"] == "teste"
+    assert set(data["total"]) == {"wall_s", "cpu_s", "rss_max_mb"}
+    assert data["total"]["wall_s"] >= st["externa"]["wall_s"] + 0.02
+    assert sorted(s["name"] for s in data["stages"]) == ["externa", "interna"]
+    for s in data["stages"]:
+        assert set(s) == {"name", "calls", "wall_s", "cpu_s", "rss_max_mb"}
+        assert s["calls"] == st[s["name"]]["calls"]
+
+
+def test_trace_mem_adds_traced_peak(tmp_path, capsys):
+    out = tmp_path / "perfil.json"
+    with Profiler("teste", enabled=True, json_path=out, trace_mem=True) as prof:
+        with prof.stage("aloca"):
+            buf = bytearray(8 * 2**20)
+        del buf
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["stages"][0]["traced_peak_mb"] >= 8
+    assert "traced_peak_mb" in data["total"]
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    out = tmp_path / "perfil.json"
+    with Profiler("teste", json_path=out) as prof:
+        with prof.stage("x"):
+            pass
+    assert prof.stages == {} and not out.exists()
+
+
+def test_lazy_import_defers_execution(tmp_path, monkeypatch):
+    # o módulo conta as próprias execuções num atributo de builtins
+    (tmp_path / "modulo_preguicoso.py").write_text(
+        "import builtins\nbuiltins._modulo_preguicoso_execs = "
+        "getattr(builtins, '_modulo_preguicoso_execs', 0) + 1\nVALOR = 42\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "modulo_preguicoso", raising=False)
+    monkeypatch.setattr(builtins, "_modulo_preguicoso_execs", 0, raising=False)
+
+    mod = lazy_import("modulo_preguicoso")
+    assert builtins._modulo_preguicoso_execs == 0
+    assert mod.VALOR == 42
+    assert builtins._modulo_preguicoso_execs == 1
+    assert lazy_import("modulo_preguicoso") is mod
+    monkeypatch.delitem(sys.modules, "modulo_preguicoso")
+
+
+def test_lazy_import_missing_package_raises():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("pacote_que_nao_existe_xyz")
+    assert "pacote_que_nao_existe_xyz" not in sys.modules
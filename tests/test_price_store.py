@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kkr
+
+
+class CountingFetcher:
+    """Fetcher local: um preço por dia útil, registrando cada chamada."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        idx = pd.bdate_range(start, end, inclusive="left")
+        return pd.DataFrame({"close": np.arange(len(idx), dtype=float) + 10.0}, index=idx)
+
+
+class StrictFetcher(CountingFetcher):
+    """
+    Como o download_prices_yf: RuntimeError quando o trecho não tem pregões.
+    Preço constante por ticker (PETR3=100, resto=10) para o teste saber qual foi servido.
+    """
+
+    def __init__(self, holidays=(), down=()):
+        super().__init__()
+        self.holidays = pd.DatetimeIndex(holidays)
+        self.down = set(down)
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        idx = pd.bdate_range(start, end, inclusive="left").difference(self.holidays)
+        if ticker in self.down or idx.empty:
+            raise RuntimeError(f"Falha ao baixar {ticker}: None")
+        price = 100.0 if ticker.startswith("PETR3") else 10.0
+        return pd.DataFrame({"close": np.full(len(idx), price)}, index=idx)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return kkr.PriceStore(tmp_path / "cache")
+
+
+def test_cold_run_fetches_requested_range(store):
+    fetch = CountingFetcher()
+    df = kkr.get_prices("PETR4.SA", None, store=store, fetcher=fetch,
+                        start="2010-01-01", end="2011-01-01")
+    assert fetch.calls == [("PETR4.SA", "2010-01-01", "2011-01-01")]
+    assert len(df) == len(pd.bdate_range("2010-01-01", "2011-01-01", inclusive="left"))
+    assert list(df.columns) == ["close", "year"]
+
+
+def test_warm_run_does_not_fetch(store):
+    fetch = CountingFetcher()
+    first = store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=fetch)
+    fetch.calls.clear()
+
+    again = store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=fetch)
+    inner = store.get("PETR4.SA", "2010-03-01", "2010-06-01", fetcher=fetch)
+
+    assert fetch.calls == []
+    pd.testing.assert_frame_equal(first, again)
+    assert inner.index.min() >= pd.Timestamp("2010-03-01")
+    assert inner.index.max() < pd.Timestamp("2010-06-01")
+
+
+def test_widened_range_fetches_only_edge_gaps(store):
+    fetch = CountingFetcher()
+    store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=fetch)
+    fetch.calls.clear()
+
+    df = store.get("PETR4.SA", "2009-01-01", "2012-01-01", fetcher=fetch)
+
+    assert fetch.calls == [("PETR4.SA", "2009-01-01", "2010-01-01"),
+                           ("PETR4.SA", "2011-01-01", "2012-01-01")]
+    assert len(df) == len(pd.bdate_range("2009-01-01", "2012-01-01", inclusive="left"))
+    assert df.index.is_monotonic_increasing and not df.index.has_duplicates
+
+
+def test_offline_without_coverage_raises(store):
+    fetch = CountingFetcher()
+    with pytest.raises(RuntimeError):
+        store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=None)
+    with pytest.raises(RuntimeError):
+        kkr.get_prices("PETR4.SA", None, store=store, offline=True, fetcher=fetch)
+    assert fetch.calls == []
+
+
+def test_offline_serves_covered_range(store):
+    store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=CountingFetcher())
+    fetch = CountingFetcher()
+    df = kkr.get_prices("PETR4.SA", None, store=store, offline=True, fetcher=fetch,
+                        start="2010-01-01", end="2011-01-01")
+    assert fetch.calls == []
+    assert not df.empty
+
+
+def test_missing_ranges_skips_weekend_only_gaps():
+    # cache cobre seg 2010-01-04 .. sex 2010-01-08 (fim exclusivo no sábado)
+    span = (np.datetime64("2010-01-04"), np.datetime64("2010-01-09"))
+    assert kkr.PriceStore.missing_ranges(span, "2010-01-04", "2010-01-11") == []
+    assert kkr.PriceStore.missing_ranges(span, "2010-01-02", "2010-01-09") == []
+    assert kkr.PriceStore.missing_ranges(span, "2010-01-04", "2010-01-12") == [
+        ("2010-01-09", "2010-01-12")]
+    assert kkr.PriceStore.missing_ranges(None, "2010-01-04", "2010-01-09") == [
+        ("2010-01-04", "2010-01-09")]
+
+
+def test_holiday_only_gap_counts_as_covered(store):
+    fetch = StrictFetcher(holidays=["2010-12-31"])   # feriado da B3
+    store.get("PETR4.SA", "2010-01-01", "2010-12-31", fetcher=fetch)
+    fetch.calls.clear()
+
+    df = kkr.get_prices("PETR4.SA", None, store=store, fetcher=fetch,
+                        start="2010-01-01", end="2011-01-01")
+
+    assert fetch.calls == [("PETR4.SA", "2010-12-31", "2011-01-01")]
+    assert (df["close"] == 10).all()   # PETR4, sem fallback para PETR3
+    fetch.calls.clear()
+    store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=fetch)
+    assert fetch.calls == []         # o feriado entrou no intervalo coberto
+
+
+def test_failed_large_gap_serves_cache_and_retries_later(store):
+    store.get("PETR4.SA", "2010-01-01", "2011-01-01", fetcher=StrictFetcher())
+    fetch = StrictFetcher(down={"PETR4.SA"})
+
+    df = kkr.get_prices("PETR4.SA", None, store=store, fetcher=fetch,
+                        start="2010-01-01", end="2012-01-01")
+
+    assert (df["close"] == 10).all()
+    assert df.index.max() < pd.Timestamp("2011-01-01")
+    assert kkr.PriceStore.missing_ranges(store.load("PETR4.SA")[1], "2010-01-01",
+                                         "2012-01-01") == [("2011-01-01", "2012-01-01")]
+
+
+def test_fallback_only_when_no_data_at_all(store):
+    fetch = StrictFetcher(down={"PETR4.SA"})
+    df = kkr.get_prices("PETR4.SA", None, store=store, fetcher=fetch,
+                        start="2010-01-01", end="2011-01-01")
+    assert (df["close"] == 100).all()
+    assert [c[0] for c in fetch.calls] == ["PETR4.SA", "PETR3.SA"]
+
+
+def yfinance_shaped(ticker, start, end):
+    """Formato do download_prices_yf com yfinance atual: colunas MultiIndex (Price, Ticker)."""
+    idx = pd.bdate_range(start, end, inclusive="left", name="Date")
+    cols = pd.MultiIndex.from_tuples([("close", ticker)], names=["Price", "Ticker"])
+    df = pd.DataFrame(np.linspace(10, 20, len(idx))[:, None], index=idx, columns=cols)
+    df["year"] = df.index.year
+    return df
+
+
+@pytest.mark.parametrize("use_store", [False, True])
+def test_multiindex_fetcher_output_is_flattened(tmp_path, use_store):
+    store = kkr.PriceStore(tmp_path / "cache") if use_store else None
+    df = kkr.get_prices("PETR4.SA", None, store=store, fetcher=yfinance_shaped,
+                        start="2010-01-01", end="2011-01-01")
+
+    assert list(df.columns) == ["close", "year"]
+    assert df["close"].dtype == float
+
+    engine = kkr.IndicatorEngine([15])
+    engine.fit(df[["close"]])
+    ind = engine.columns_for("close")
+    assert list(ind.columns) == ["mms15", "mme15", "dp15"]
+    assert len(ind) == len(df)
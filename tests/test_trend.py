@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import kkr
+
+
+def old_analyze_trend(df):
+    # tabela anual como o kkr.py original montava (loop por ano)
+    rows = []
+    for year, chunk in df.groupby("year"):
+        first = float(chunk["close"].iloc[0])
+        last = float(chunk["close"].iloc[-1])
+        rows.append({
+            "ano": year,
+            "primeiro_dia": round(first, 2),
+            "ultimo_dia": round(last, 2),
+            "Δ(R$)": round(last - first, 2),
+            "Δ(%)": round(100 * (last / first - 1), 2) if first != 0 else None,
+            "subiu?": "SIM" if last > first else "NÃO",
+        })
+    return pd.DataFrame(rows).sort_values("ano").reset_index(drop=True)
+
+
+def random_panel(tickers=("PETR4.SA",), start="2008-01-01", end="2015-12-31", seed=0):
+    idx = pd.bdate_range(start, end)
+    rng = np.random.default_rng(seed)
+    x = 20 + np.cumsum(rng.normal(0, 0.5, (len(idx), len(tickers))), axis=0)
+    return pd.DataFrame(x, index=idx, columns=list(tickers))
+
+
+def test_single_ticker_year_matches_old_table():
+    panel = random_panel()
+    df = kkr.price_frame(panel.iloc[:, 0])
+
+    out, first_all, last_all, up = kkr.analyze_trend(df)
+    tm.assert_frame_equal(out, old_analyze_trend(df))
+    assert not isinstance(out["subiu?"].dtype, pd.CategoricalDtype)
+    assert (first_all, last_all) == (round(panel.iloc[0, 0], 2), round(panel.iloc[-1, 0], 2))
+    assert up == ("SIM" if panel.iloc[-1, 0] > panel.iloc[0, 0] else "NÃO")
+
+
+def test_zero_first_close_gives_missing_pct():
+    panel = random_panel(start="2010-01-01", end="2011-12-31")
+    panel.iloc[0, 0] = 0.0
+    out = kkr.trend_table(panel)
+    assert np.isnan(out.loc[0, "Δ(%)"]) and not np.isnan(out.loc[1, "Δ(%)"])
+
+
+@pytest.mark.parametrize("period", list(kkr.PERIODS))
+def test_nan_path_matches_fast_path(period):
+    panel = random_panel(("A", "B"), start="2012-01-01", end="2013-12-31")
+    fast = kkr.trend_table(panel, period)
+
+    # linhas só com NaN desviam para o groupby sem mudar first/last de ninguém
+    holes = pd.DataFrame(np.nan, index=panel.index[:-1] + pd.Timedelta(hours=12),
+                         columns=panel.columns)
+    slow = kkr.trend_table(pd.concat([panel, holes]).sort_index(), period)
+    tm.assert_frame_equal(slow, fast)
+
+
+@pytest.mark.parametrize("period, labels", [
+    ("quarter", ["2012Q1", "2012Q2", "2012Q3", "2012Q4"]),
+    ("month", [f"2012-{m:02d}" for m in range(1, 13)]),
+    ("week", None),
+])
+def test_period_labels(period, labels):
+    panel = random_panel(start="2012-01-01", end="2012-12-31")
+    out = kkr.trend_table(panel, period)
+    col = kkr.PERIODS[period][1]
+    assert list(out.columns) == [col, "primeiro_dia", "ultimo_dia", "Δ(R$)", "Δ(%)", "subiu?"]
+    assert pd.api.types.is_string_dtype(out[col])
+    if labels is not None:
+        assert list(out[col]) == labels
+    else:
+        assert out[col].iloc[0] == "2012-01-02/2012-01-08"
+        assert len(out) == panel.index.to_period("W").nunique()
+        assert out[col].is_unique
+
+
+def test_invalid_period():
+    with pytest.raises(ValueError):
+        kkr.trend_table(random_panel(), "decade")
+
+
+def test_multi_ticker_columns_and_order():
+    panel = random_panel(("PETR4.SA", "PETR3.SA", "VALE3.SA"), start="2010-01-01", end="2012-12-31")
+    out = kkr.trend_table(panel)
+
+    assert list(out.columns) == ["ticker", "ano", "primeiro_dia", "ultimo_dia",
+                                 "Δ(R$)", "Δ(%)", "subiu?"]
+    assert list(out["ticker"].cat.categories) == list(panel.columns)
+    assert list(out["ticker"]) == [t for t in panel.columns for _ in range(3)]
+    assert list(out["ano"]) == [2010, 2011, 2012] * 3
+    assert isinstance(out["subiu?"].dtype, pd.CategoricalDtype)
+
+    # cada bloco é a tabela de um ticker sozinho
+    for t, block in out.groupby("ticker", observed=True):
+        alone = kkr.trend_table(panel[[t]])
+        tm.assert_frame_equal(block.drop(columns="ticker").reset_index(drop=True),
+                              alone, check_dtype=False, check_categorical=False)
+
+
+def test_ticker_without_data_in_a_period_has_missing_trend():
+    panel = random_panel(("A", "B"), start="2010-01-01", end="2011-12-31")
+    panel.loc["2011", "B"] = np.nan    # B sem negociação em 2011
+    out = kkr.trend_table(panel)
+    b2011 = out[(out["ticker"] == "B") & (out["ano"] == 2011)].iloc[0]
+    assert pd.isna(b2011["subiu?"]) and np.isnan(b2011["primeiro_dia"])
+    assert out["subiu?"].notna().sum() == 3
+
+    single = kkr.trend_table(panel[["B"]])
+    assert list(single["subiu?"].isna()) == [False, True]